@@ -0,0 +1,297 @@
+"""
+Local HTTP/JSON design service wrapping doe_toolkit
+
+Usage: python doe_server.py [--host 127.0.0.1] [--port 8765] [--workers N] [--cache-size 128] [--max-runs 10000]
+
+Endpoints (POST bodies are JSON: {"factors": {"Pressure": [40, 70], ...}, "type": "full"})
+    GET  /health             service status, cache and in-flight counts
+    GET  /types              supported design types
+    POST /design             design table with run count and generation time
+    POST /merit              design merit statistics (D/A/G efficiency, max prediction variance)
+    POST /compare            merit of every design type ("types" optional)
+    POST /export?format=...  design table only, as json (default) or arrow (IPC stream, needs pyarrow)
+
+Generation runs in a process pool, identical concurrent requests share one build,
+and finished designs go into the doe_toolkit design cache (LRU eviction).
+Designs over the run cap are rejected before building, and a pool broken by a
+dead worker is replaced (that request gets a 503).
+"""
+
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import urlsplit, parse_qs
+import doe_toolkit
+import asyncio
+import argparse
+import json
+import math
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+STATUS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+          413: "Payload Too Large", 422: "Unprocessable Entity",
+          431: "Request Header Fields Too Large", 500: "Internal Server Error",
+          501: "Not Implemented", 503: "Service Unavailable"}
+MAX_BODY = 1 << 20 # 1 MiB of factors is plenty
+MAX_RUNS = 10000 # e.g. a full factorial of 4 factors x 10 levels
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class DesignService():
+    def __init__(self, workers=None, max_runs=MAX_RUNS, executor=ProcessPoolExecutor):
+        self.max_runs = max_runs
+        self._workers = workers
+        self._executor = executor
+        self._pool = executor(max_workers=workers)
+        self._inflight = {}
+
+    @property
+    def inflight(self):
+        return len(self._inflight)
+
+    async def design(self, factors, type):
+        """
+        Returns (design df, generation time), from the cache, an identical
+        in-flight build, or a new build in the process pool
+        """
+        runs = doe_toolkit.predicted_runs(factors, type)
+        if runs > self.max_runs:
+            raise RequestError(422, f"Design '{type}' would have {runs} runs, the limit is {self.max_runs}")
+
+        result = doe_toolkit.cached_design(factors, type)
+        if result is not None:
+            return result
+
+        key = doe_toolkit.design_key(factors, type)
+        if key not in self._inflight:
+            self._inflight[key] = asyncio.ensure_future(self._build(key, factors, type))
+        # shield so one client hanging up does not cancel the build for the others
+        return await asyncio.shield(self._inflight[key])
+
+    async def _build(self, key, factors, type):
+        loop = asyncio.get_running_loop()
+        pool = self._pool
+        try:
+            result = await loop.run_in_executor(pool, doe_toolkit.timed_design, factors, type)
+            doe_toolkit.cache_design(factors, type, result)
+            return result
+        except BrokenProcessPool:
+            # a worker died (killed, out of memory), start a fresh pool once
+            if self._pool is pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = self._executor(max_workers=self._workers)
+            raise RequestError(503, "Design worker died, the worker pool was restarted, try again")
+        finally:
+            del self._inflight[key]
+
+    async def merit(self, factors, type):
+        doe, seconds = await self.design(factors, type)
+        loop = asyncio.get_running_loop()
+        merit = await loop.run_in_executor(None, doe_toolkit.design_merit, doe, factors)
+        return doe, seconds, merit
+
+    def shutdown(self):
+        self._pool.shutdown(cancel_futures=True)
+
+
+def _number(x):
+    # JSON has no NaN
+    x = float(x)
+    return None if math.isnan(x) else x
+
+def _records(doe):
+    return json.loads(doe.to_json(orient="records"))
+
+def _arrow(doe):
+    if pa is None:
+        raise RequestError(501, "Arrow export needs pyarrow installed")
+    table = pa.Table.from_pandas(doe, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def _parse_factors(body):
+    factors = body.get("factors")
+    if not isinstance(factors, dict) or not factors:
+        raise RequestError(400, "'factors' must be an object of factor -> [levels]")
+    for factor, levels in factors.items():
+        if not isinstance(levels, list) or len(levels) < 2:
+            raise RequestError(400, f"Factor '{factor}' needs a list of at least 2 levels")
+        if not all(isinstance(level, (int, float, str)) for level in levels):
+            raise RequestError(400, f"Factor '{factor}' levels must be numbers or strings")
+    return factors
+
+def _parse_type(type):
+    if type not in doe_toolkit.DESIGN_TYPES:
+        raise RequestError(400, f"Invalid DOE type: '{type}', expected one of {doe_toolkit.DESIGN_TYPES}")
+    return type
+
+
+async def handle(service, method, path, query, body):
+    """
+    Routes one request, returns (status, content type, payload bytes)
+    """
+    if path == "/health":
+        payload = {"status": "ok",
+                   "cached": doe_toolkit.cache_len(),
+                   "inflight": service.inflight}
+        return 200, "application/json", json.dumps(payload).encode()
+    if path == "/types":
+        return 200, "application/json", json.dumps(doe_toolkit.DESIGN_TYPES).encode()
+    if path not in ["/design", "/merit", "/compare", "/export"]:
+        raise RequestError(404, f"No endpoint '{path}'")
+    if method != "POST":
+        raise RequestError(405, f"'{path}' only accepts POST")
+
+    try:
+        body = json.loads(body or b"{}")
+    except ValueError as err:
+        raise RequestError(400, f"Invalid JSON: {err}")
+    if not isinstance(body, dict):
+        raise RequestError(400, "Request body must be a JSON object")
+    factors = _parse_factors(body)
+    if path == "/compare":
+        types = body.get("types", doe_toolkit.DESIGN_TYPES)
+        if not isinstance(types, list) or not all(isinstance(type, str) for type in types):
+            raise RequestError(400, "'types' must be a list of design types")
+        types = [_parse_type(type) for type in types]
+
+    try:
+        if path == "/compare":
+            results = await asyncio.gather(*[service.merit(factors, type) for type in types],
+                                           return_exceptions=True)
+            rows = []
+            for type, result in zip(types, results):
+                if isinstance(result, Exception):
+                    rows.append({"type": type, "error": str(result)})
+                    continue
+                doe, seconds, merit = result
+                rows.append({"type": type, "runs": len(doe), "seconds": seconds,
+                             **{name: _number(value) for name, value in merit.items()}})
+            return 200, "application/json", json.dumps(rows).encode()
+
+        type = _parse_type(body.get("type"))
+        if path == "/merit":
+            doe, seconds, merit = await service.merit(factors, type)
+            payload = {"type": type, "runs": len(doe), "seconds": seconds,
+                       **{name: _number(value) for name, value in merit.items()}}
+            return 200, "application/json", json.dumps(payload).encode()
+
+        doe, seconds = await service.design(factors, type)
+    except RequestError:
+        raise
+    except Exception as err:
+        # doepy rejects some factor / type combinations (e.g. Box-Behnken with < 3 factors)
+        raise RequestError(422, f"Design '{body.get('type')}' failed: {err}")
+
+    if path == "/design":
+        payload = {"type": type, "runs": len(doe), "seconds": seconds, "design": _records(doe)}
+        return 200, "application/json", json.dumps(payload).encode()
+
+    format = query.get("format", [body.get("format", "json")])[0]
+    if format == "json":
+        return 200, "application/json", json.dumps(_records(doe)).encode()
+    elif format == "arrow":
+        return 200, "application/vnd.apache.arrow.stream", _arrow(doe)
+    raise RequestError(400, f"Invalid export format: '{format}', expected json or arrow")
+
+
+async def _readline(reader):
+    try:
+        return await reader.readline()
+    except ValueError:
+        # StreamReader raises ValueError for a line over its 64 KiB limit
+        raise RequestError(431, "Request line or header over the size limit")
+
+
+async def serve_client(service, reader, writer):
+    """
+    HTTP/1.1 with keep-alive, one request at a time per connection
+    """
+    try:
+        while True:
+            keep_alive = True
+            try:
+                request_line = await _readline(reader)
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await _readline(reader)
+                    if line in [b"\r\n", b"\n", b""]:
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                method, target, _ = request_line.decode("latin-1").split()
+                url = urlsplit(target)
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    raise RequestError(413, f"Request body over {MAX_BODY} bytes")
+                body = await reader.readexactly(length) if length else b""
+                status, content_type, payload = await handle(service, method.upper(), url.path,
+                                                             parse_qs(url.query), body)
+            except RequestError as err:
+                if err.status in [413, 431]:
+                    keep_alive = False # rest of the request is still unread
+                status, content_type = err.status, "application/json"
+                payload = json.dumps({"error": str(err)}).encode()
+            except ValueError:
+                keep_alive = False
+                status, content_type = 400, "application/json"
+                payload = json.dumps({"error": "Malformed request"}).encode()
+            except Exception as err:
+                status, content_type = 500, "application/json"
+                payload = json.dumps({"error": str(err)}).encode()
+
+            writer.write((f"HTTP/1.1 {status} {STATUS[status]}\r\n"
+                          f"Content-Type: {content_type}\r\n"
+                          f"Content-Length: {len(payload)}\r\n"
+                          f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                          "\r\n").encode() + payload)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def main(host="127.0.0.1", port=8765, workers=None, max_runs=MAX_RUNS):
+    service = DesignService(workers=workers, max_runs=max_runs)
+    server = await asyncio.start_server(lambda r, w: serve_client(service, r, w), host, port)
+    print(f"DOE design service on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON DOE design service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None, help="design worker processes (default: CPU count)")
+    parser.add_argument("--cache-size", type=int, default=doe_toolkit.DESIGN_CACHE_SIZE, help="designs kept in the LRU cache")
+    parser.add_argument("--max-runs", type=int, default=MAX_RUNS, help="largest design (in runs) the service will build")
+    args = parser.parse_args()
+
+    doe_toolkit.DESIGN_CACHE_SIZE = args.cache_size
+    try:
+        asyncio.run(main(args.host, args.port, args.workers, args.max_runs))
+    except KeyboardInterrupt:
+        print("Closing Server")
@@ -13,11 +13,28 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from sklearn.preprocessing import LabelEncoder
-import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import OrderedDict
+import multiprocessing
+import numpy as np
+import sys, os, time, math
 
 # if len(sys.argv) < 2:
 #     sys.exit("Usage: python doe.py [full | frac <res> | fill | cc[cif] ]")
 
+DESIGN_TYPES = ["full", "fill", "boxb", "frac", "ccf", "cci", "ccc"]
+
+# Shared design cache: (type, factors) -> (design df, generation time in s)
+# Least recently used entries are evicted past DESIGN_CACHE_SIZE
+# Random designs (space filling) are never cached, each build is a new one
+DESIGN_CACHE_SIZE = 128
+RANDOM_TYPES = ["fill"]
+_design_cache = OrderedDict()
+
+# Process pool for compare(), created on first use and kept for the session
+_pool = None
+
 class DOE():
     def __init__(self, factors=None, levels=None, type=None, design=None):
         self._factors = factors
@@ -49,7 +66,7 @@ class DOE():
     
     @type.setter
     def type(self, type):
-        if type in ["full", "fill", "boxb", "frac", "ccc", "cci", "ccf"]:
+        if type in DESIGN_TYPES:
             self._type = type
         else: 
             sys.exit(f"Invalid DOE type: '{type}'")
@@ -66,18 +83,7 @@ def main(factors, type=None, plot=None):
     my_doe = DOE(factors.keys(), factors.values(), type=type)
     # print(my_doe.factors, my_doe.levels, my_doe.type, sep="\n")
 
-    doe = pd.DataFrame({}) # initializes an empty dataframe to prevent printing nothing later on
-
-    if type == "full":
-        doe = full_factorial(**factors)
-    elif type == "fill":
-        doe = space_filling_lhs(**factors)
-    elif type == "boxb":
-        doe = box_benkhen(**factors)
-    elif type == "frac":
-        doe = fract_factorial(**factors, res=2)
-    elif type == "ccc" or type == "cci" or type == "ccf":
-        doe = central_composite(face=type, **factors)
+    doe = build_design(factors, type)
     
     if not doe.empty :
         # print(doe)
@@ -95,6 +101,192 @@ def main(factors, type=None, plot=None):
         return doe.to_dict()
 
 
+def design_key(factors, type):
+    return (type, tuple((factor, tuple(levels)) for factor, levels in factors.items()))
+
+def cache_len():
+    return len(_design_cache)
+
+def predicted_runs(factors, type):
+    """
+    Exact run count of a design before building it, matching doepy's
+    builders (all but full factorial only use the low / high levels);
+    0 where doepy cannot build the design at all
+    """
+    k = len(factors)
+    if type == "full":
+        return math.prod(len(levels) for levels in factors.values())
+    elif type == "boxb":
+        return 2 * k * (k - 1) + 1 if k >= 3 else 0 # 1 center point
+    elif type == "ccc" or type == "cci" or type == "ccf":
+        return 2 ** k + 2 * k + 4 if k >= 2 else 0 # center=(2, 2), 4 center points
+    elif type == "frac":
+        # doepy's fracfact_by_res(k, res=2): fewest base factors m whose
+        # interactions (2^m - 2 + m of them) can carry k factors; its generator
+        # then repeats up to m base letters, each one doubling the runs
+        if k <= 2:
+            return 0
+        m = next(m for m in range(1, k) if 2 ** m - 2 + m >= k)
+        return 2 ** (m + min(k - m, m))
+    return 2 ** k # fill
+
+def cached_design(factors, type):
+    """
+    Returns the cached (design df, generation time) or None
+    """
+    key = design_key(factors, type)
+    if key not in _design_cache:
+        return None
+    _design_cache.move_to_end(key)
+    return _design_cache[key]
+
+def cache_design(factors, type, result):
+    if type in RANDOM_TYPES:
+        return
+    key = design_key(factors, type)
+    _design_cache[key] = result
+    _design_cache.move_to_end(key)
+    while len(_design_cache) > DESIGN_CACHE_SIZE:
+        _design_cache.popitem(last=False)
+
+def timed_design(factors, type):
+    """
+    Builds a design and times it (module level so it can run in a process pool)
+    """
+    start = time.perf_counter()
+    # doepy edits the level lists in place (adds mid-points), build from copies
+    factors = {factor: list(levels) for factor, levels in factors.items()}
+    doe = pd.DataFrame({}) # initializes an empty dataframe to prevent printing nothing later on
+
+    if type == "full":
+        doe = full_factorial(**factors)
+    elif type == "fill":
+        doe = space_filling_lhs(**factors)
+    elif type == "boxb":
+        doe = box_benkhen(**factors)
+    elif type == "frac":
+        doe = fract_factorial(**factors, res=2)
+    elif type == "ccc" or type == "cci" or type == "ccf":
+        doe = central_composite(face=type, **factors)
+
+    return doe, time.perf_counter() - start
+
+def build_design(factors, type):
+    result = cached_design(factors, type)
+    if result is None:
+        result = timed_design(factors, type)
+        cache_design(factors, type, result)
+    return result[0].copy()
+
+def design_merit(df, factors=None):
+    """
+    Design Merit (first order model with intercept)
+    ==================
+    Numeric factors are coded so the factor table's low / high levels are -1 / 1
+    (points outside the range, e.g. CCC axial points, land past +-1); without
+    factors, or for categorical factors (label encoded), the design's own range is used
+    D/A/G efficiencies are in percent, max prediction variance is the
+    largest scaled prediction variance N x'(X'X)^-1 x over the design points
+    """
+    merit = {"D-Efficiency": np.nan, "A-Efficiency": np.nan,
+             "G-Efficiency": np.nan, "Max Pred Var": np.nan}
+    if df.empty:
+        return merit
+
+    coded = []
+    for factor in df.columns:
+        col = df[factor]
+        if col.dtype == 'object':
+            values = pd.factorize(col)[0].astype(float)
+            low, high = values.min(), values.max()
+        else:
+            values = col.to_numpy(dtype=float)
+            levels = values if factors is None else np.asarray(factors[factor], dtype=float)
+            low, high = levels.min(), levels.max()
+        coded.append(np.zeros(len(values)) if high == low else 2 * (values - low) / (high - low) - 1)
+
+    X = np.column_stack([np.ones(len(df)), *coded])
+    n, p = X.shape
+    info = X.T @ X
+    if n < p or np.linalg.matrix_rank(info) < p:
+        return merit # singular design, model not estimable
+
+    inv = np.linalg.inv(info)
+    pred_var = n * np.einsum('ij,jk,ik->i', X, inv, X)
+    merit["D-Efficiency"] = 100 * np.linalg.det(info) ** (1 / p) / n
+    merit["A-Efficiency"] = 100 * p / (n * np.trace(inv))
+    merit["G-Efficiency"] = 100 * p / pred_var.max()
+    merit["Max Pred Var"] = pred_var.max()
+    return merit
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # spawn, forking a process with Qt running is unsafe
+        _pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+def start_pool():
+    """
+    Starts the compare pool workers in the background without waiting,
+    so the first Compare does not pay for spawning them
+    """
+    if _pool is None:
+        pool = _get_pool()
+        for _ in range(min(len(DESIGN_TYPES), os.cpu_count() or 1)):
+            pool.submit(int) # no-op, makes the pool spawn a worker
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+def compare(factors, types=DESIGN_TYPES, executor=None):
+    """
+    Builds every design type for one set of factors in a process pool
+    (the module pool unless an executor is passed in)
+    Designs already in the shared cache are reused instead of rebuilt
+    Failed designs keep their error message in the "Error" column
+    """
+    global _pool
+    results = {}
+    errors = {}
+    missing = []
+    for type in types:
+        result = cached_design(factors, type)
+        if result is not None:
+            results[type] = result
+        else:
+            missing.append(type)
+
+    if missing:
+        pool = executor or _get_pool()
+        futures = {type: pool.submit(timed_design, factors, type) for type in missing}
+        for type, future in futures.items():
+            try:
+                results[type] = future.result()
+                cache_design(factors, type, results[type])
+            except BrokenProcessPool as err:
+                # a worker died, start a fresh pool next time
+                if pool is _pool:
+                    pool.shutdown(wait=False)
+                    _pool = None
+                errors[type] = str(err)
+            except Exception as err:
+                errors[type] = str(err)
+
+    rows = []
+    for type in types:
+        doe, seconds = results.get(type, (pd.DataFrame({}), np.nan))
+        rows.append({"Design": type,
+                     "Runs": len(doe),
+                     "Time (s)": seconds,
+                     **design_merit(doe, factors),
+                     "Error": errors.get(type, "")})
+    return pd.DataFrame(rows)
+
+
 def full_factorial(**kwargs):
     df = build.full_fact(kwargs)
     df.index = df.index + 1
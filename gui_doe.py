@@ -1,6 +1,6 @@
 import sys, time, os
 from PyQt5.QtGui import QIcon
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from PyQt5.QtWidgets import (QApplication, QWidget,
                             QPushButton, QAction,
                             QMainWindow, QMessageBox,
@@ -13,6 +13,7 @@ from PyQt5.QtWidgets import (QApplication, QWidget,
                             )
 import doe_toolkit
 import pandas as pd
+import multiprocessing
 
 basedir = os.path.dirname(__file__)
 
@@ -23,6 +24,23 @@ try:
 except ImportError:
     pass
 
+class CompareWorker(QThread):
+    """
+    Runs doe_toolkit.compare off the UI thread, emits the table (or the exception)
+    """
+    done = pyqtSignal(object)
+
+    def __init__(self, table, parent=None):
+        super().__init__(parent)
+        self.table = table
+
+    def run(self):
+        try:
+            self.done.emit(doe_toolkit.compare(self.table))
+        except Exception as err:
+            self.done.emit(err)
+
+
 class DOE_Builder(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -175,6 +193,7 @@ class DOE_Builder(QMainWindow):
                                       QMessageBox.Yes | QMessageBox.No)
         if close_choice == QMessageBox.Yes:
             print("Closing Application")
+            doe_toolkit.shutdown_pool()
             sys.exit()
 
     def dType_ErrorMsg(self):
@@ -300,14 +319,28 @@ class DOE_Builder(QMainWindow):
             self.plot_box.setCurrentText(plot)
 
         # Create Button To Read
-        read_button = QPushButton("Next", self)
-        read_button.setFixedWidth(80)
-        read_button.clicked.connect(self.readTableData) # THIS is what happens when next clicked
+        self.read_button = QPushButton("Next", self)
+        self.read_button.setFixedWidth(80)
+        self.read_button.clicked.connect(self.readTableData) # THIS is what happens when next clicked
+
+        # Create Button To Compare every design type
+        self.compare_button = QPushButton("Compare", self)
+        self.compare_button.setFixedWidth(80)
+        self.compare_button.setStatusTip("Build all design types and compare them")
+        self.compare_button.clicked.connect(lambda: self.readTableData(compare=True))
+
+        # Spawn the compare workers now so the first Compare click does not wait on them
+        doe_toolkit.start_pool()
+
+        # Stack NEXT and COMPARE buttons
+        buttons = QVBoxLayout()
+        buttons.addWidget(self.read_button)
+        buttons.addWidget(self.compare_button)
 
         # Set up Bottom H Layout
         nextHLayout = QHBoxLayout()
         nextHLayout.addLayout(designOptions)
-        nextHLayout.addWidget(read_button)
+        nextHLayout.addLayout(buttons)
         
         # Overall Layout Wrapper
         layout.addLayout(nextHLayout)
@@ -375,6 +408,52 @@ class DOE_Builder(QMainWindow):
         self.central_widget.setLayout(layout)
 
 
+    def displayComparison(self, factor_table=None, compare_table=None, type=None, plot=None):
+        """
+        --- Show run count, build time and merit of every design type
+        """
+        self.setWindowTitle("DOE Builder - Design Comparison")
+        self.setGeometry(100, 100, 650, 300)
+
+        self.central_widget = QWidget(self)
+        self.setCentralWidget(self.central_widget)
+
+        self.activeWindow = "Compare"
+
+        # Create a layout to hold the table
+        layout = QVBoxLayout()
+
+        # Create a QTableWidget and populate it with DataFrame data
+        self.table_widget_compare = QTableWidget()
+        self.table_widget_compare.setRowCount(compare_table.shape[0])
+        self.table_widget_compare.setColumnCount(compare_table.shape[1])
+        self.table_widget_compare.setHorizontalHeaderLabels(compare_table.columns)
+
+        # Round floats (n/a where the design or its model could not be built)
+        df = compare_table.map(lambda x: ("n/a" if pd.isna(x) else f'{x:.3g}') if isinstance(x, float) else x)
+        for i in range(df.shape[0]):
+            for j in range(df.shape[1]):
+                item = QTableWidgetItem(str(df.iloc[i, j]))
+                self.table_widget_compare.setItem(i, j, item)
+        # Failed designs show "failed" instead of 0 runs, reason in the Error column
+        runs_col = compare_table.columns.get_loc("Runs")
+        for i in range(df.shape[0]):
+            if compare_table["Error"].iloc[i]:
+                self.table_widget_compare.setItem(i, runs_col, QTableWidgetItem("failed"))
+        self.table_widget_compare.resizeColumnsToContents()
+
+        # Back Button
+        back_button = QPushButton("Back", self)
+        back_button.setFixedWidth(80)
+        back_button.clicked.connect(lambda: self.buildFactors(factor_table=factor_table, type=type, plot=plot))
+
+        layout.addWidget(self.table_widget_compare)
+        layout.addWidget(back_button)
+
+        self.table_widget_compare.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.central_widget.setLayout(layout)
+
+
     def updateRowLabels(self):
         # Change row label to letters
         row_labels = [chr(ord("A") + i) for i in range(self.table_widget_factors.rowCount())]
@@ -402,7 +481,7 @@ class DOE_Builder(QMainWindow):
         self.table_widget_factors.setRowCount(num_rows)
 
 
-    def readTableData(self, save_table=False):
+    def readTableData(self, save_table=False, compare=False):
         # Generates a factor_table (a list of dicts) from the GUI
         if self.activeWindow == "Factors":
             table_widget = self.table_widget_factors
@@ -455,15 +534,28 @@ class DOE_Builder(QMainWindow):
             
             # Run (design) table and Factor table as dataframes from doe_toolkit
             factor_table = pd.DataFrame(factor_table)
-            if save_table == False:
+            if compare == True:
+                # Every design type at once, in a background thread (see compareFinished)
+                self.read_button.setEnabled(False)
+                self.compare_button.setEnabled(False)
+                QApplication.setOverrideCursor(Qt.WaitCursor)
+                self.compare_context = {"type_dict": type_dict, "factor_table": factor_table,
+                                        "type": type_name, "plot": plot_name}
+                self.compare_worker = CompareWorker(table, self)
+                self.compare_worker.done.connect(self.compareFinished)
+                self.compare_worker.start()
+            elif save_table == False:
                 run_table = pd.DataFrame(doe_toolkit.main(table, type, plot))
                 # This is what reads the results from the toolkit
                 self.displayDesign(design_table=run_table, factor_table=factor_table, type=type_name, plot=plot_name)
             else:
                 return factor_table
 
-        elif self.activeWindow == "Design":
-            table_widget = self.table_widget_design
+        elif self.activeWindow in ["Design", "Compare"]:
+            if self.activeWindow == "Design":
+                table_widget = self.table_widget_design
+            else:
+                table_widget = self.table_widget_compare
             # TODO # Read Design Tables and Return a df that can be saved
             # Extract data from the QTableWidget
             rows = table_widget.rowCount()
@@ -481,6 +573,23 @@ class DOE_Builder(QMainWindow):
             return df
 
 
+    def compareFinished(self, compare_table):
+        QApplication.restoreOverrideCursor()
+        context = self.compare_context
+        if isinstance(compare_table, Exception):
+            print(f"Compare failed: {compare_table}")
+            if self.activeWindow == "Factors":
+                self.read_button.setEnabled(True)
+                self.compare_button.setEnabled(True)
+            return
+
+        # Short codes mapped back to display names
+        name_dict = {code: name for name, code in context["type_dict"].items()}
+        compare_table["Design"] = compare_table["Design"].map(name_dict)
+        self.displayComparison(compare_table=compare_table, factor_table=context["factor_table"],
+                               type=context["type"], plot=context["plot"])
+
+
     def analyzeData(self):
         # Tab/table for Responses and Measurements
         """
@@ -493,9 +602,12 @@ class DOE_Builder(QMainWindow):
 
 
 if __name__ == "__main__":
+    # Needed for the Compare process pool in frozen (pyinstaller) builds
+    multiprocessing.freeze_support()
     # App definition with command line args []
     app = QApplication([])
     app.setStyle("windowsvista")
     app.setWindowIcon(QIcon(os.path.join(basedir, "icons", 'doe_deer.png')))
+    app.aboutToQuit.connect(doe_toolkit.shutdown_pool)
     GUI = DOE_Builder()
     sys.exit(app.exec_())
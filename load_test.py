@@ -0,0 +1,88 @@
+"""
+Load test for doe_server.py, measures throughput and latency
+
+Usage: python load_test.py [--port 8765] [--endpoint /design] [--concurrency 16] [--requests 500] [--unique 0]
+
+Each client keeps one keep-alive connection open and sends requests back to back.
+--unique N spreads requests over N distinct factor tables (0 = all identical,
+which exercises the cache and request coalescing; a large N exercises the worker pool).
+"""
+
+
+import asyncio
+import argparse
+import json
+import time
+import statistics
+
+
+async def client(host, port, endpoint, bodies, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for body in bodies:
+            payload = json.dumps(body).encode()
+            start = time.perf_counter()
+            writer.write((f"POST {endpoint} HTTP/1.1\r\n"
+                          f"Host: {host}\r\n"
+                          "Content-Type: application/json\r\n"
+                          f"Content-Length: {len(payload)}\r\n"
+                          "\r\n").encode() + payload)
+            await writer.drain()
+
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in [b"\r\n", b""]:
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.strip().lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+def make_body(i, unique, type):
+    # Offset the levels so each of the `unique` factor tables is a separate cache entry
+    shift = i % unique if unique else 0
+    return {"type": type,
+            "factors": {"Pressure": [40 + shift, 70 + shift],
+                        "Temperature": [290, 350],
+                        "Flow rate": [0.2, 0.4]}}
+
+
+async def main(args):
+    bodies = [make_body(i, args.unique, args.type) for i in range(args.requests)]
+    # Deal the requests out round robin to the clients
+    per_client = [bodies[n::args.concurrency] for n in range(args.concurrency)]
+    latencies, errors = [], []
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client(args.host, args.port, args.endpoint, chunk, latencies, errors)
+                           for chunk in per_client if chunk])
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency * 1000 for latency in latencies)
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))]
+    print(f"Endpoint:    {args.endpoint} ({args.type}, {args.unique or 1} distinct tables)")
+    print(f"Requests:    {len(latencies)} ({len(errors)} errors) with {args.concurrency} clients")
+    print(f"Elapsed:     {elapsed:.2f} s")
+    print(f"Throughput:  {len(latencies) / elapsed:.1f} req/s")
+    print(f"Latency ms:  mean {statistics.mean(latencies):.2f} | p50 {percentile(50):.2f} | "
+          f"p95 {percentile(95):.2f} | p99 {percentile(99):.2f} | max {latencies[-1]:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test for the DOE design service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--endpoint", default="/design", help="/design, /merit, /compare or /export")
+    parser.add_argument("--type", default="full")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--unique", type=int, default=0, help="distinct factor tables (0 = all identical)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,182 @@
+"""
+Tests for doe_server.py, run with: python -m pytest -q
+
+Requests go straight to handle() / serve_client(), no GUI or network needed.
+Builds run in a thread pool so doe_toolkit.timed_design can be monkeypatched.
+"""
+
+
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import doe_toolkit
+import doe_server
+import asyncio
+import json
+import time
+import pytest
+
+
+FACTORS = {"Pressure": [40, 70], "Temperature": [290, 350], "Flow rate": [0.2, 0.4]}
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    doe_toolkit._design_cache.clear()
+    yield
+    doe_toolkit._design_cache.clear()
+
+
+def request(service, path, body=None, method="POST", query=None):
+    """
+    Returns (status, parsed JSON payload) the way serve_client would answer
+    """
+    async def run():
+        try:
+            status, _, payload = await doe_server.handle(service, method, path, query or {},
+                                                         json.dumps(body).encode() if body is not None else b"")
+        except doe_server.RequestError as err:
+            return err.status, {"error": str(err)}
+        return status, json.loads(payload)
+    return asyncio.run(run())
+
+
+def thread_service(**kwargs):
+    return doe_server.DesignService(workers=2, executor=ThreadPoolExecutor, **kwargs)
+
+
+def test_design():
+    status, payload = request(thread_service(), "/design", {"factors": FACTORS, "type": "full"})
+    assert status == 200
+    assert payload["runs"] == 8
+    assert len(payload["design"]) == 8
+
+
+@pytest.mark.parametrize("path, body, method, status", [
+    ("/nope", None, "GET", 404),
+    ("/design", None, "GET", 405),
+    ("/design", {"factors": FACTORS, "type": "nope"}, "POST", 400),
+    ("/design", {"factors": {"A": [1]}, "type": "full"}, "POST", 400),
+    ("/design", ["not", "an", "object"], "POST", 400),
+    ("/compare", {"factors": FACTORS, "types": None}, "POST", 400),
+    ("/compare", {"factors": FACTORS, "types": "full"}, "POST", 400),
+    ("/export?format=csv", {"factors": FACTORS, "type": "full", "format": "csv"}, "POST", 400),
+    # Box-Behnken needs at least 3 factors, doepy raises
+    ("/design", {"factors": {"A": [0, 1], "B": [0, 1]}, "type": "boxb"}, "POST", 422),
+    # 10^7 runs, over the cap
+    ("/design", {"factors": {f"X{i}": list(range(10)) for i in range(7)}, "type": "full"}, "POST", 422),
+    # 2^20 + 40 + 4 runs, over the cap
+    ("/design", {"factors": {f"X{i}": [0, 1] for i in range(20)}, "type": "ccf"}, "POST", 422),
+])
+def test_errors(path, body, method, status):
+    got, payload = request(thread_service(), path.split("?")[0], body, method)
+    assert got == status
+    assert "error" in payload
+
+
+@pytest.mark.parametrize("k, type, runs", [
+    (3, "frac", 8),
+    (8, "frac", 64),
+    (14, "frac", 256), # 2^14 = 16384 would be over the cap
+    (3, "ccf", 18),
+    (3, "ccc", 18),
+    (5, "cci", 46),
+    (4, "boxb", 25),
+])
+def test_run_counts(k, type, runs):
+    factors = {f"X{i}": [0, 1] for i in range(k)}
+    assert doe_toolkit.predicted_runs(factors, type) == runs
+    status, payload = request(thread_service(), "/design", {"factors": factors, "type": type})
+    assert status == 200
+    assert payload["runs"] == runs
+
+
+def test_run_cap_is_exact():
+    body = {"factors": FACTORS, "type": "ccf"} # 18 runs
+    assert request(thread_service(max_runs=18), "/design", body)[0] == 200
+    assert request(thread_service(max_runs=17), "/design", body)[0] == 422
+
+
+def test_identical_requests_share_one_build(monkeypatch):
+    calls = []
+    def slow_design(factors, type):
+        calls.append(type)
+        time.sleep(0.2)
+        return doe_toolkit.full_factorial(**factors), 0.2
+    monkeypatch.setattr(doe_toolkit, "timed_design", slow_design)
+
+    service = thread_service()
+    async def run():
+        body = json.dumps({"factors": FACTORS, "type": "full"}).encode()
+        return await asyncio.gather(*[doe_server.handle(service, "POST", "/design", {}, body)
+                                      for _ in range(5)])
+    results = asyncio.run(run())
+
+    assert calls == ["full"]
+    assert all(status == 200 for status, _, _ in results)
+    assert service.inflight == 0
+    # finished build is served from the cache afterwards
+    assert request(service, "/design", {"factors": FACTORS, "type": "full"})[0] == 200
+    assert calls == ["full"]
+
+
+def test_broken_pool_is_replaced():
+    pools = []
+    class BreaksOnce(ThreadPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            pools.append(self)
+        def submit(self, *args, **kwargs):
+            if len(pools) == 1:
+                raise BrokenProcessPool("A child process terminated abruptly")
+            return super().submit(*args, **kwargs)
+
+    service = doe_server.DesignService(executor=BreaksOnce)
+    assert request(service, "/design", {"factors": FACTORS, "type": "full"})[0] == 503
+    assert request(service, "/design", {"factors": FACTORS, "type": "full"})[0] == 200
+    assert len(pools) == 2
+
+
+def test_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(doe_toolkit, "DESIGN_CACHE_SIZE", 3)
+    for low in range(5):
+        doe_toolkit.cache_design({"A": [low, 10]}, "full", (None, 0.0))
+    assert doe_toolkit.cache_len() == 3
+    assert doe_toolkit.cached_design({"A": [0, 10]}, "full") is None
+    assert doe_toolkit.cached_design({"A": [4, 10]}, "full") is not None
+
+    # a hit moves the entry to the back of the line
+    doe_toolkit.cached_design({"A": [2, 10]}, "full")
+    doe_toolkit.cache_design({"A": [5, 10]}, "full", (None, 0.0))
+    assert doe_toolkit.cached_design({"A": [2, 10]}, "full") is not None
+    assert doe_toolkit.cached_design({"A": [3, 10]}, "full") is None
+
+
+def test_random_designs_are_not_cached():
+    doe_toolkit.cache_design(FACTORS, "fill", (None, 0.0))
+    assert doe_toolkit.cache_len() == 0
+
+
+def test_oversized_header_gets_431():
+    class Writer():
+        def __init__(self):
+            self.data = b""
+            self.closed = False
+        def write(self, data):
+            self.data += data
+        async def drain(self):
+            pass
+        def close(self):
+            self.closed = True
+
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"GET /health HTTP/1.1\r\nX-Big: " + b"a" * 70000 + b"\r\n\r\n")
+        reader.feed_eof()
+        writer = Writer()
+        await doe_server.serve_client(thread_service(), reader, writer)
+        return writer
+
+    writer = asyncio.run(run())
+    assert writer.data.startswith(b"HTTP/1.1 431")
+    assert b"Connection: close" in writer.data
+    assert writer.closed
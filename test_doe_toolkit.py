@@ -0,0 +1,68 @@
+"""
+Tests for doe_toolkit.compare / design_merit, run with: python -m pytest -q
+
+compare() gets a thread pool so nothing spawns worker processes.
+"""
+
+
+from concurrent.futures import ThreadPoolExecutor
+import doe_toolkit
+import pytest
+
+
+FACTORS = {"Pressure": [40, 70], "Temperature": [290, 350], "Flow rate": [2, 4]}
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    doe_toolkit._design_cache.clear()
+    yield
+    doe_toolkit._design_cache.clear()
+
+
+def compare(factors, types=doe_toolkit.DESIGN_TYPES):
+    with ThreadPoolExecutor() as pool:
+        return doe_toolkit.compare(factors, types, executor=pool).set_index("Design")
+
+
+def test_full_factorial_merit():
+    row = compare(FACTORS, ["full"]).loc["full"]
+    assert row["Runs"] == 8
+    assert row["Error"] == ""
+    # 2^3 is orthogonal: 100 % efficient, max scaled prediction variance = p = 4
+    assert row["D-Efficiency"] == pytest.approx(100)
+    assert row["A-Efficiency"] == pytest.approx(100)
+    assert row["G-Efficiency"] == pytest.approx(100)
+    assert row["Max Pred Var"] == pytest.approx(4)
+
+
+def test_failed_type_keeps_error_and_other_rows():
+    table = compare({"A": [0, 1], "B": [0, 1]})
+    assert "at least 3" in table.loc["boxb", "Error"]
+    assert table.loc["boxb", "Runs"] == 0
+
+    ok = table[table["Error"] == ""]
+    assert {"full", "fill", "ccf", "cci", "ccc"} <= set(ok.index)
+    assert ok["Runs"].gt(0).all()
+    assert ok["Max Pred Var"].notna().all()
+
+
+def test_merit_is_coded_against_factor_levels():
+    table = compare(FACTORS, ["ccc", "cci"])
+    # CCI sits inside the low / high range, CCC reaches past it, so CCC is more efficient
+    assert table.loc["ccc", "D-Efficiency"] > table.loc["cci", "D-Efficiency"]
+    assert table.loc["ccc", "A-Efficiency"] > table.loc["cci", "A-Efficiency"]
+
+
+def test_compare_reuses_cache():
+    compare(FACTORS, ["full"])
+    cached = doe_toolkit.cached_design(FACTORS, "full")
+    assert cached is not None
+    assert compare(FACTORS, ["full"]).loc["full", "Time (s)"] == cached[1]
+
+
+def test_builds_do_not_change_factors():
+    factors = {"A": [0, 10], "B": [0, 10], "C": [0, 10]}
+    for type in doe_toolkit.DESIGN_TYPES:
+        doe_toolkit.timed_design(factors, type)
+    assert factors == {"A": [0, 10], "B": [0, 10], "C": [0, 10]}